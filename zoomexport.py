@@ -1,17 +1,99 @@
-import glob
+import os
 import csv
+import itertools
+import collections
+import functools
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
 
-from bokeh.plotting import figure
-from bokeh.models import Range1d, Legend
-from bokeh.palettes import Set1, Set2
+# Date/time formats used in zoom CSV exports (meeting start vs. poll submission)
+_PERFORMANCE_DATETIME_FORMAT = '%b %d, %Y %I:%M %p'
+_POLL_DATETIME_FORMAT = '%b %d, %Y %H:%M:%S'
+
+# Below this many question-answer pairs, poll answers are counted in plain Python,
+# which avoids the fixed overhead of pandas groupby for typical poll sizes
+_POLL_COUNT_GROUPBY_MIN_PAIRS = 5000
 
 
 
 # Data Import
 # -----------
 
+def _list_reports(folder, suffix):
+	""" Lists report files in a folder by file name suffix
+	
+	Args:
+		folder (str): Path to a folder containing CSV files
+		suffix (str): File name ending, e.g. 'Poll Report.csv'
+	
+	Returns: list of file paths (empty if folder does not exist or cannot be read)
+	"""
+	# scandir entries cache file type information, saving a stat() call per file over glob
+	try:
+		with os.scandir(folder) as entries:
+			return [e.path for e in entries 
+					if e.name.endswith(suffix) and not e.name.startswith('.') and e.is_file()]
+	except OSError:
+		# Like glob, treat a missing or unreadable folder as containing no reports
+		return []
+
+
+def _read_files(reader, files, workers=None):
+	""" Applies a single-file reader function to a list of files, 
+	overlapping file I/O using a pool of threads
+	
+	Args:
+		reader (function): Function taking a file name, e.g. read_poll_report
+		files ([str]): List of file names to read
+		workers (int): Maximum number of threads (default: one per file, max. 32)
+	
+	Returns: list of reader results, in the same order as files
+	"""
+	if workers is None:
+		workers = min(32, len(files))
+	if workers <= 1 or len(files) <= 1:
+		return [reader(f) for f in files]
+
+	with ThreadPoolExecutor(max_workers=workers) as ex:
+		return list(ex.map(reader, files))
+
+
+def _read_performance_meta(filename):
+	""" Reads metadata from a single Zoom 'Performance Report' as a dict,
+	leaving the meeting date and time unparsed (see read_performance_report)
+	"""
+	# All metadata is contained in the first 9 lines, no need to read attendee details
+	with open(filename, 'r', encoding='utf-8') as pr:
+		lines = list(itertools.islice(pr, 9))
+
+	# Only tokenize the lines with meeting info, attendance, and number of Q&A questions
+	meeting, attendance, qa = csv.reader([lines[3], lines[6], lines[8]], delimiter=',', quotechar='"')
+
+	meta = {'topic':            meeting[0],
+			'meeting_id':       meeting[1].replace('-', ''),
+			'datetime':         meeting[2],
+			'duration':         int(meeting[3]),
+			'registered':       int(attendance[0]),
+			'attended':         int(attendance[1]),
+			'attendance_rate':  float(attendance[2]) / 100,
+			'questions':        int(qa[0])
+		   }
+	return meta
+
+
+def _parse_performance_dates(df, date_format):
+	""" Converts the 'datetime' column of performance report data to pandas 
+	datetime, and adds a formatted 'date_str' column for easy plotting
+	"""
+	df['datetime'] = pd.to_datetime(df['datetime'], format=_PERFORMANCE_DATETIME_FORMAT, cache=True)
+
+	# strftime runs per element in Python, so only format each distinct timestamp once
+	codes, uniques = pd.factorize(df['datetime'])
+	df['date_str'] = np.asarray(uniques.strftime(date_format), dtype=object)[codes]
+	return df
+
+
 def read_performance_report(filename, date_format='%d.%m.'):
 	""" Reads metadata from a single Zoom 'Performance Report'
 	
@@ -31,114 +113,189 @@ def read_performance_report(filename, date_format='%d.%m.'):
 		- 'questions': Number of Q&A questions recorded
 		- 'date_str': Formatted date string for plotting (see date_format)
 	"""
-	prdata = []
-	with open(filename, 'r', encoding='utf-8') as pr:
-		csvdata = csv.reader(pr, delimiter=',', quotechar='"')
-		for line in csvdata:
-			prdata.append(line)
-
-	meta = {'topic':            [str(prdata[3][0])],
-			'meeting_id':       [str(prdata[3][1].replace('-', ''))],
-			'datetime':         [str(prdata[3][2])],
-			'duration':         [int(prdata[3][3])],
-			'registered':       [int(prdata[6][0])],
-			'attended':         [int(prdata[6][1])],
-			'attendance_rate':  [float(prdata[6][2]) / 100],
-			'questions':        [int(prdata[8][0])]
-		   }
+	df = pd.DataFrame([_read_performance_meta(filename)])
+	return _parse_performance_dates(df, date_format)
 
-	df = pd.DataFrame(meta)
 
-	# Convert dates to pandas datetime, but keep a date string for easy plotting
-	df.loc[:, 'datetime'] = pd.to_datetime(df.datetime, format='%b %d, %Y %I:%M %p')
-	df.loc[:, 'date_str'] = df.datetime.dt.strftime(date_format)
-	return df
-
-
-def read_all_performance_reports(folder='.'):
+def read_all_performance_reports(folder='.', workers=None, date_format='%d.%m.'):
 	""" Reads and aggregates a folder of zoom 'Performance Report' files
 	into a DataFrame for analysis. 
 
 	Args:
 		folder (str): Path to a folder containing CSV files
+		workers (int): Number of files to read in parallel (default: all, max. 32)
+		date_format (str): Format string for the 'date_str' column 
+			(see read_performance_report)
 
 	Returns: pandas DataFrame, one row per report
 	"""
-	data = pd.DataFrame(columns=['topic', 'meeting_id', 'datetime', 'duration',
-								 'registered', 'attended', 'attendance_rate', 
-								 'questions', 'date_str'])
-	perfs = glob.glob('{:s}/*Performance Report.csv'.format(folder))
-	for perf_rep in perfs:
-		data = data.append(read_performance_report(perf_rep), 
-						   ignore_index=True, sort=False)
-	
+	cols = ['topic', 'meeting_id', 'datetime', 'duration', 'registered', 
+			'attended', 'attendance_rate', 'questions']
+	perfs = _list_reports(folder, 'Performance Report.csv')
+	meta = _read_files(_read_performance_meta, perfs, workers)
+
+	# Build the frame in one go, and parse all dates in a single batch
+	data = pd.DataFrame(meta, columns=cols)
+	data = _parse_performance_dates(data, date_format)
 	data = data.sort_values('datetime').reset_index(drop=True)
 	return data
 
 	
-def read_poll_report(filename):
-	""" Reads poll questions and answers from a single zoom 'Poll Report'
-	into a long-format DataFrame (one row per attendee*question)
-	
+def _read_poll_columns(filename):
+	""" Reads the question-answer pairs from a single zoom 'Poll Report'
+	into plain lists, one entry per attendee*question
+
 	Args:
 		filename (str): Name of Zoom CSV file to read
-	
-	Returns:
+
+	Returns: tuple (meeting_id, dict) with the dict mapping the column names
+		of _read_poll_answers to lists of values
 	"""
-	polldata = []
+	row_nos, names, emails, dts, questions, answers = [], [], [], [], [], []
+
 	with open(filename, 'r', encoding='utf-8') as pr:
-		for line in pr.readlines():
-			polldata.append(line)
+		# Extract meeting ID, then skip the rest of the header to get the actual CSV data
+		header = list(itertools.islice(pr, 6))
+		meeting_id = str(header[3].split(',')[1].replace('-', ''))
+
+		# Question-answer pairs follow after number, name, email, and date, then a final empty
+		# field. Rows differ in length, since zoom tacks on questions answered by the same 
+		# participants horizontally, so slice each row instead of looping over cells
+		for line in csv.reader(pr, delimiter=',', quotechar='"'):
+			q_texts = line[4:len(line)-1:2]
+			k = len(q_texts)
+			if k == 0:
+				continue
+			row_nos.extend([int(line[0])] * k)
+			names.extend([line[1]] * k)
+			emails.extend([line[2]] * k)
+			dts.extend([line[3]] * k)
+			questions.extend(q_texts)
+			answers.extend(line[5:5+2*k:2])
+
+	columns = {'row_no': row_nos,
+			   'name': names,
+			   'email': emails,
+			   'datetime': dts,
+			   'question': questions,
+			   'answer': answers}
+	return meeting_id, columns
+
+
+def _read_poll_answers(filename):
+	""" Reads the question-answer pairs from a single zoom 'Poll Report'
+	into a long-format table (one row per attendee*question)
 	
-	# Extract meeting ID, then drop header to get the actual CSV data
-	meeting_id = str(polldata[3].split(',')[1].replace('-', ''))
-	polldata = polldata[6:]
+	Args:
+		filename (str): Name of Zoom CSV file to read
 	
-	# Read question-answer pairs and aggregate counts
-	poll = []
-
-	csvdata = csv.reader(polldata, delimiter=',', quotechar='"')
-	for line in csvdata:
-		num_questions = len(line) - 5 # skipping number, name, email, date, and final empty field
-		for q in list(range(0, num_questions, 2)):
-				q_text = str(line[4+q])   # question
-				a_text = str(line[4+q+1]) # answer
-
-				qdata = {'meeting_id': meeting_id,
-						 'row_no': int(line[0]),
-						 'name': str(line[1]),
-						 'email': str(line[2]),
-						 'datetime': str(line[3]),
-						 'question': q_text,
-						 'answer': a_text}
-				poll.append(qdata)
+	Returns: tuple (meeting_id, DataFrame) with DataFrame columns:
+		- 'row_no': Response number from the report
+		- 'name', 'email': Respondent name and email address
+		- 'datetime': Submission date and time (unparsed string)
+		- 'question': Poll question text
+		- 'answer': Answer text for corresponding poll question
+	"""
+	meeting_id, columns = _read_poll_columns(filename)
+	return meeting_id, pd.DataFrame(columns)
 
-	cols = ['meeting_id', 'row_no', 'name', 'email', 'datetime', 'question', 'answer']
-	df = pd.DataFrame(poll, columns=cols)
+
+def _read_poll_rows(filename):
+	""" Reads a single zoom 'Poll Report' like read_poll_report, 
+	but leaves the 'datetime' column unparsed
+	"""
+	meeting_id, df = _read_poll_answers(filename)
+	df.insert(0, 'meeting_id', meeting_id)
+	return df
+
+
+def _categorize_poll_columns(df):
+	""" Converts the low-cardinality text columns of poll data (meeting ID, 
+	question, answer) to categorical dtype for faster comparisons and grouping
+	"""
+	# Categories of text columns come out sorted, so sorting by them stays alphabetical
+	for col in ('meeting_id', 'question', 'answer'):
+		df[col] = df[col].astype('category')
+	return df
+
+
+def _parse_poll_dates(df):
+	""" Converts the submission 'datetime' column of poll data to pandas datetime """
 	# Note: date/time format is actually different here than in the CSV header! -.-
-	df.loc[:, 'datetime'] = pd.to_datetime(df.datetime, format='%b %d, %Y %H:%M:%S')
+	df['datetime'] = pd.to_datetime(df['datetime'], format=_POLL_DATETIME_FORMAT, cache=True)
 	return df
 
 
-def read_all_poll_reports(folder='.'):
+def read_poll_report(filename):
+	""" Reads poll questions and answers from a single zoom 'Poll Report'
+	into a long-format DataFrame (one row per attendee*question)
+	
+	Args:
+		filename (str): Name of Zoom CSV file to read
+	
+	Returns:
+	"""
+	df = _parse_poll_dates(_read_poll_rows(filename))
+	return _categorize_poll_columns(df)
+
+
+def read_all_poll_reports(folder='.', workers=None):
 	""" Reads and aggregates a folder of zoom 'Poll Report' files
 	into a DataFrame for analysis
 
 	Args:
 		folder (str): Path to a folder containing CSV files
+		workers (int): Number of files to read in parallel (default: all, max. 32)
 
 	Returns: pandas DataFrame, one row per report*question*answer
 	"""
 	cols = ['meeting_id', 'row_no', 'name', 'email', 'datetime', 'question', 'answer']
-	data = pd.DataFrame(columns=cols)
-	polls = glob.glob('{:s}/*Poll Report.csv'.format(folder))
-	for poll_rep in polls:
-		data = data.append(read_poll_report(poll_rep), ignore_index=True)
-	
+	polls = _list_reports(folder, 'Poll Report.csv')
+	frames = _read_files(_read_poll_rows, polls, workers)
+
+	if frames:
+		data = pd.concat(frames, ignore_index=True, sort=False)
+	else:
+		data = pd.DataFrame(columns=cols)
+	data = _parse_poll_dates(data)
+	data = _categorize_poll_columns(data)
 	data = data.sort_values(['question', 'answer']).reset_index(drop=True)
 	return data
 
 
+def _count_poll_answers(filename):
+	""" Reads a single zoom 'Poll Report' like read_poll_report_counts, 
+	but leaves the text columns uncategorized
+	"""
+	meeting_id, columns = _read_poll_columns(filename)
+	questions, answers = columns['question'], columns['answer']
+	cols = ['meeting_id', 'question', 'answer', 'count', 'prop', 'responses']
+
+	# Count participants for each question to accurately calculate answer proportions
+	# Note: zoom seems to export in blocks of questions depending on the number of 
+	# respondents, i.e. questions answered by the same participants are tacked on horizontally
+	if len(questions) < _POLL_COUNT_GROUPBY_MIN_PAIRS:
+		counts = collections.Counter(zip(questions, answers))
+		N = collections.Counter(questions)
+
+		# List answers grouped by question, both in order of first appearance
+		order = {q: i for i, q in enumerate(N)}
+		pairs = sorted(counts.items(), key=lambda item: order[item[0][0]])
+		polltable = [(meeting_id, q, a, c, c / N[q], N[q]) for (q, a), c in pairs]
+		return pd.DataFrame(polltable, columns=cols)
+
+	answers = pd.DataFrame({'question': questions, 'answer': answers})
+	df = answers.groupby(['question', 'answer'], sort=False).size().rename('count').reset_index()
+	df['responses'] = df.groupby('question', sort=False)['count'].transform('sum')
+
+	# List answers grouped by question, both in order of first appearance
+	order = np.argsort(pd.factorize(df['question'])[0], kind='stable')
+	df = df.iloc[order].reset_index(drop=True)
+	df.insert(0, 'meeting_id', meeting_id)
+	df['prop'] = df['count'] / df['responses']
+	return df[cols]
+
+
 def read_poll_report_counts(filename):
 	""" Reads poll questions and answers from a single zoom 'Poll Report'
 	and aggregates answer counts per question
@@ -153,66 +310,29 @@ def read_poll_report_counts(filename):
 		- 'count': Number of responses for a given answer
 		- 'prop': Proportion of responses for a given answer
 	"""
-	polldata = []
-	with open(filename, 'r', encoding='utf-8') as pr:
-		for line in pr.readlines():
-			polldata.append(line)
-	
-	# Extract meeting ID, then drop header to get the actual CSV data
-	meeting_id = str(polldata[3].split(',')[1].replace('-', ''))
-	polldata = polldata[6:]
-	
-	# Read question-answer pairs and aggregate counts
-	poll = {}
-	N = {}
-
-	csvdata = csv.reader(polldata, delimiter=',', quotechar='"')
-	for line in csvdata:
-		num_questions = len(line) - 5 # skipping number, name, email, date, and final empty field
-		for q in list(range(0, num_questions, 2)):
-				q_text = str(line[4+q])   # question
-				a_text = str(line[4+q+1]) # answer
-
-				if q_text not in poll.keys():
-					poll[q_text] = {}
-				if a_text not in poll[q_text].keys():
-					poll[q_text][a_text] = 1
-				else:    
-					poll[q_text][a_text] += 1
-
-				# Count participants for each question to accurately calculate answer proportions
-				# Note: zoom seems to export in blocks of questions depending on the number of 
-				# respondents, i.e. questions answered by the same participants are tacked on horizontally
-				if q_text not in N.keys():
-					N[q_text] = 1
-				else:
-					N[q_text] += 1
-		
-	# Convert dict of counts to a DataFrame
-	polltable = []
-	for q in poll.keys():
-		for a in poll[q].keys():
-			polltable.append([str(meeting_id), q, a, int(poll[q][a]), float(poll[q][a]) / float(N[q]), int(N[q])])
-	cols = ['meeting_id', 'question', 'answer', 'count', 'prop', 'responses']
-	
-	return pd.DataFrame(polltable, columns=cols)
+	return _categorize_poll_columns(_count_poll_answers(filename))
 
 
-def read_all_poll_report_counts(folder='.'):
+def read_all_poll_report_counts(folder='.', workers=None):
 	""" Reads and aggregates a folder of zoom 'Poll Report' files
 	into a DataFrame for analysis, aggregating response counts. 
 
 	Args:
 		folder (str): Path to a folder containing CSV files
+		workers (int): Number of files to read in parallel (default: all, max. 32)
 
 	Returns: pandas DataFrame, one row per report*question*answer
 	"""
 	cols = ['meeting_id', 'question', 'answer', 'count', 'prop', 'responses']
-	data = pd.DataFrame(columns=cols)
-	polls = glob.glob('{:s}/*Poll Report.csv'.format(folder))
-	for poll_rep in polls:
-		data = data.append(read_poll_report_counts(poll_rep), ignore_index=True)
-	
+	polls = _list_reports(folder, 'Poll Report.csv')
+	frames = _read_files(_count_poll_answers, polls, workers)
+
+	# Convert to categorical once, after concatenating, so categories span all files
+	if frames:
+		data = pd.concat(frames, ignore_index=True, sort=False)
+	else:
+		data = pd.DataFrame(columns=cols)
+	data = _categorize_poll_columns(data)
 	data = data.sort_values(['question', 'answer']).reset_index(drop=True)
 	return data
 
@@ -221,6 +341,23 @@ def read_all_poll_report_counts(folder='.'):
 # Visualization
 # -------------
 
+# Note: Bokeh is only imported inside the plotting functions, so that reading
+# reports does not pay for importing it
+
+@functools.lru_cache(maxsize=None)
+def _palette(name, size):
+	""" Returns a Bokeh color palette, e.g. _palette('Set1', 6) for Set1[6] """
+	from bokeh import palettes
+	return getattr(palettes, name)[size]
+
+
+def _truncate(text, length):
+	""" Shortens text longer than length characters for use as plot labels """
+	if len(text) <= length:
+		return text
+	return text[0:length+1] + '...'
+
+
 def plot_attendance_bokeh(perf_report, questions=False, title='Meeting Attendance',
 						  legend = ['Registered', 'Attended', 'Questions']):
 	""" Plot attendance across meetings using the Bokeh library
@@ -233,18 +370,22 @@ def plot_attendance_bokeh(perf_report, questions=False, title='Meeting Attendanc
 
 	Returns: Bokeh figure object
 	"""
+	from bokeh.plotting import figure
+	from bokeh.models import ColumnDataSource, Range1d
+
 	columns = ['registered', 'attended']
 	if questions:
 		columns.append('questions')
-	colors = Set1[6]
+	colors = _palette('Set1', 6)
 	
 	fig = figure(x_range=perf_report.date_str, title=title, plot_width=700, plot_height=400)
 
-	c = 0
+	# All glyphs share one data source, so dates are only stored once in the output
+	source = ColumnDataSource(data={'date_str': perf_report['date_str'].to_numpy(),
+									**{d: perf_report[d].to_numpy() for d in columns}})
 	for ix, d in enumerate(columns):
-		fig.line(perf_report.date_str, perf_report[d], line_width=2, color=colors[c], legend_label=legend[ix])
-		fig.scatter(perf_report.date_str, perf_report[d], size=6, color=colors[c])
-		c += 1
+		fig.line('date_str', d, source=source, line_width=2, color=colors[ix], legend_label=legend[ix])
+		fig.scatter('date_str', d, source=source, size=6, color=colors[ix])
 
 	fig.xaxis[0].axis_label = 'Meeting Date'
 	fig.yaxis[0].axis_label = 'Count'
@@ -254,6 +395,38 @@ def plot_attendance_bokeh(perf_report, questions=False, title='Meeting Attendanc
 	return fig
 
 
+def _prepare_question_frame(polldata, question, prop):
+	""" Selects the data for a single poll question and reshapes it 
+	to one column per answer, one row per meeting date ('date_str')
+
+	Args:
+		polldata: pandas DataFrame from read_poll_report_counts
+		question (str): Text of poll question
+		prop (bool): if True, use proportions (in percent) instead of counts
+
+	Returns: tuple (DataFrame, list of answers in column order)
+	"""
+	# Select question data, either proportions or counts
+	value_col = 'prop' if prop else 'count'
+	data = polldata.loc[polldata['question'] == question, ['date_str', 'answer', value_col]]
+	if prop:
+		data = data.assign(prop=data['prop'].to_numpy() * 100) # convert to percent for display
+	else:
+		data = data.assign(count=data['count'].to_numpy().astype('int64'))
+
+	# One value per date and answer can be reshaped without aggregation, pivot_table
+	# is only needed to average over several meetings on the same date
+	if data.duplicated(['date_str', 'answer']).any():
+		data = data.pivot_table(columns='answer', values=value_col, index='date_str')
+	else:
+		data = data.pivot(columns='answer', values=value_col, index='date_str')
+	
+	# Answers are already unique in the pivoted columns, no need for another pass over the data
+	a = list(data.columns)
+	data = data.reset_index().fillna(0) # Ensure all cells are valid
+	return data, a
+
+
 def plot_question_bokeh(polldata, question, prop=True, answer_sort=None):
 	""" Plot response proportions for a specific poll question 
 	as line plot using the Bokeh library
@@ -267,31 +440,22 @@ def plot_question_bokeh(polldata, question, prop=True, answer_sort=None):
 
 	Returns: Bokeh figure object
 	"""
-	# Select question data, either proportions or counts
-	if prop:
-		data = polldata.loc[(polldata.loc[:, 'question'] == question), ['date_str', 'answer', 'prop']]
-		data.loc[:, 'prop'] = data.loc[:, 'prop'] * 100 # convert to percent for display
-		a = list(data.answer.unique())
-		data = data.pivot_table(columns='answer', values='prop', index=['date_str']).reset_index()
-	else:
-		data = polldata.loc[(polldata.loc[:, 'question'] == question), ['date_str', 'answer', 'count']]
-		a = list(data.answer.unique())
-		data.loc[:, 'count'] = data.loc[:, 'count'].astype('int64')
-		data = data.pivot_table(columns='answer', values='count', index=['date_str']).reset_index()  
-	
-	data.fillna(0, inplace=True) # Ensure all cells are valid
+	from bokeh.plotting import figure
+	from bokeh.models import ColumnDataSource
+
+	data, a = _prepare_question_frame(polldata, question, prop)
 
-	colors = Set2[8]
-	colors = colors[0:len(a)]
+	colors = _palette('Set2', 8)[0:len(a)]
 
 	# Allow specifying answer order for stacking
 	if answer_sort is not None:
 		a = answer_sort
 
 	fig = figure(x_range=data['date_str'], title=question, plot_width=600, plot_height=400)
+	source = ColumnDataSource(data={col: data[col].to_numpy() for col in data.columns})
 	for ix, ans in enumerate(a):
-		fig.line(data.date_str, data.loc[:, ans], line_width=2, color=colors[ix], legend_label=a[ix])
-		fig.scatter(data.date_str, data.loc[:, ans], size=6, color=colors[ix])
+		fig.line('date_str', ans, source=source, line_width=2, color=colors[ix], legend_label=a[ix])
+		fig.scatter('date_str', ans, source=source, size=6, color=colors[ix])
 
 	return fig
 
@@ -309,44 +473,31 @@ def plot_question_stacked_bokeh(polldata, question, prop=True, answer_sort=None)
 
 	Returns: Bokeh figure object
 	"""
-	# Select question data, either proportions or counts
-	if prop:
-		data = polldata.loc[(polldata.loc[:, 'question'] == question), ['date_str', 'answer', 'prop']]
-		data.loc[:, 'prop'] = data.loc[:, 'prop'] * 100 # convert to percent for display
-		a = list(data.answer.unique())
-		data = data.pivot_table(columns='answer', values='prop', index=['date_str']).reset_index()
-	else:
-		data = polldata.loc[(polldata.loc[:, 'question'] == question), ['date_str', 'answer', 'count']]
-		a = list(data.answer.unique())
-		data.loc[:, 'count'] = data.loc[:, 'count'].astype('int64')
-		data = data.pivot_table(columns='answer', values='count', index=['date_str']).reset_index()  
-	
-	data.fillna(0, inplace=True) # Ensure all cells are valid
+	from bokeh.plotting import figure
+	from bokeh.models import ColumnDataSource, Legend
 
-	colors = Set2[8]
-	colors = colors[0:len(a)]
+	data, a = _prepare_question_frame(polldata, question, prop)
+
+	colors = _palette('Set2', 8)[0:len(a)]
 
 	# Allow specifying answer order for stacking, check if all answers exist in data
 	if answer_sort is not None:
-		for var in a:
-			if var not in answer_sort:
-				err = 'All answers for a given question must be included in answer_sort:\nQuestion: {:s}\nAnswers: {:s}'
-				raise ValueError(err.format(question, str(a)))
+		if not set(answer_sort).issuperset(a):
+			err = 'All answers for a given question must be included in answer_sort:\nQuestion: {:s}\nAnswers: {:s}'
+			raise ValueError(err.format(question, str(a)))
 		a = answer_sort
 
 	# Shorten title to max. 60 characters
-	if len(question) > 60:
-		question = question[0:61] + '...'
+	question = _truncate(question, 60)
 
 	fig = figure(x_range=data['date_str'], title=question, plot_width=700, plot_height=400, toolbar_location='left')
-	bars = fig.vbar_stack(a, x='date_str', width=0.4, source=data, color=colors)
+
+	# Pass numpy arrays, which Bokeh can serialize without converting each value
+	source = ColumnDataSource(data={col: data[col].to_numpy() for col in data.columns})
+	bars = fig.vbar_stack(a, x='date_str', width=0.4, source=source, color=colors)
 
 	# Make custom legend - only way to move it outside the plot area in Bokeh (for now)
-	l_items = []
-	for ix, ans in enumerate(a):
-		if len(ans) > 35:
-			ans = ans[0:36] + '...'
-		l_items.append((str(ans), [bars[ix]]))
+	l_items = [(_truncate(ans, 35), [bars[ix]]) for ix, ans in enumerate(a)]
 	legend = Legend(items=l_items, location="center")
 	fig.add_layout(legend, 'right')
 